@@ -1,7 +1,47 @@
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import time
+import aiohttp
 import openpyxl
 import os
+from collections import namedtuple
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
+from operator import itemgetter
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+try:
+    import xlsxwriter  # Optional, faster Excel writer
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import pyarrow  # Optional, needed for Parquet output
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import orjson  # Optional, faster JSON parser
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop  # Optional, faster event loop
+except ImportError:
+    uvloop = None
+
+# JSON (de)serialization between bytes and Python objects, using orjson when available
+if orjson is not None:
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+else:
+    json_loads = json.loads
+
+    def json_dumps(data):
+        return json.dumps(data).encode('utf-8')
 
 
 load_dotenv()  # Loads environment variables from a .env file
@@ -11,26 +51,196 @@ API_KEY = os.environ.get(
     'API_KEY'
 )
 
-# Initialize the YouTube API client
-youtube = build('youtube', 'v3', developerKey=API_KEY)
+# Base URL of the YouTube Data API
+API_BASE_URL = 'https://www.googleapis.com/youtube/v3'
+
+# videos.list accepts at most 50 comma-separated IDs per call
+VIDEOS_PER_REQUEST = 50
+
+# Maximum number of concurrent API requests (and pooled connections)
+MAX_CONCURRENT_REQUESTS = 16
+
+# HTTP statuses of transient errors (rate limiting, server errors) that are retried
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Errors raised by a failed API request once its retries are exhausted
+API_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+# Fetched video details and comment pages are cached here between runs
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'yt_fetch')
+
+# Cache entries older than this many seconds are fetched again
+CACHE_TTL = 24 * 60 * 60
+
+# Column headers of the video and comment outputs
+VIDEO_HEADERS = [
+    "Video ID", "Title", "Description", "Published At", "Duration",
+    "View Count", "Like Count", "Comment Count", "Default Thumbnail",
+    "Medium Thumbnail", "High Thumbnail"
+]
+COMMENT_HEADERS = [
+    "Video ID", "Comment ID", "Comment Text", "Author Name",
+    "Published At", "Like Count", "Reply To"
+]
+
+# Video and comment field names, in the column order of the headers above
+VIDEO_FIELDS = (
+    'video_id', 'title', 'description', 'published_at', 'duration',
+    'view_count', 'like_count', 'comment_count', 'default_thumbnail',
+    'medium_thumbnail', 'high_thumbnail'
+)
+COMMENT_FIELDS = (
+    'video_id', 'comment_id', 'comment_text', 'author_name',
+    'published_at', 'like_count', 'reply_to'
+)
+
+# Video details; being a tuple, a VideoRow is written to the output files as is
+VideoRow = namedtuple('VideoRow', VIDEO_FIELDS)
+
+# Build the output row tuple of a comment dictionary in a single C-level call
+get_comment_row = itemgetter(*COMMENT_FIELDS)
+
+# Pick several fields of a videos.list response item in a single C-level call
+get_snippet_fields = itemgetter('title', 'description', 'publishedAt')
+get_thumbnails = itemgetter('default', 'medium', 'high')
+
+# Partial response selectors, so the API only sends the fields that are used
+VIDEO_RESPONSE_FIELDS = (
+    'items(id,snippet(title,description,publishedAt,thumbnails(default/url,medium/url,high/url)),'
+    'contentDetails/duration,statistics(viewCount,likeCount,commentCount))'
+)
+COMMENT_SNIPPET_FIELDS = 'snippet(textDisplay,authorDisplayName,publishedAt,likeCount)'
+COMMENT_RESPONSE_FIELDS = f'items(id,snippet/topLevelComment/{COMMENT_SNIPPET_FIELDS}),nextPageToken'
+COMMENT_RESPONSE_FIELDS_WITH_REPLIES = (
+    f'items(id,snippet/topLevelComment/{COMMENT_SNIPPET_FIELDS},replies/comments(id,{COMMENT_SNIPPET_FIELDS})),'
+    'nextPageToken'
+)
+
+# Output files are written under this suffix and only replace the previous
+# file once the run finished, so an interrupted run never destroys earlier output
+TEMP_SUFFIX = '.tmp'
+
+# Number of rows buffered per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 10000
+
+
+class QuotaExceededError(Exception):
+    """Raised when the daily YouTube Data API quota is used up."""
+
+
+def is_retryable(exception):
+    """
+    Tells whether a failed API request is worth retrying.
+
+    Args:
+        exception (Exception): The error raised by the API request.
+
+    Returns:
+        bool: True for rate limiting, server and connection errors.
+    """
+    if isinstance(exception, aiohttp.ClientResponseError):
+        return exception.status in RETRY_STATUSES
+    return isinstance(exception, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+@retry(
+    retry=retry_if_exception(is_retryable),
+    wait=wait_exponential_jitter(initial=1, max=60),
+    stop=stop_after_attempt(6),
+    reraise=True
+)
+async def fetch_api(session, semaphore, resource, params):
+    """
+    Calls a YouTube Data API list endpoint, bounded by the given semaphore.
+    Transient errors are retried with exponential backoff and jitter.
+
+    Args:
+        session (aiohttp.ClientSession): The HTTP session to send the request with.
+        semaphore (asyncio.Semaphore): Limits the number of requests in flight.
+        resource (str): The API resource, e.g. 'videos' or 'commentThreads'.
+        params (dict): Query parameters; parameters set to None are omitted.
+
+    Returns:
+        dict: The decoded JSON response.
+    """
+    query = {'key': API_KEY}
+    query.update((key, value) for key, value in params.items() if value is not None)
+    async with semaphore:
+        async with session.get(f'{API_BASE_URL}/{resource}', params=query) as response:
+            if response.status == 403 and 'quotaExceeded' in await response.text():
+                raise QuotaExceededError("Daily YouTube Data API quota exceeded")
+            response.raise_for_status()
+            return json_loads(await response.read())
+
+
+def cache_path(key):
+    """
+    Returns the path of a cache entry. The file is named after a hash of the
+    key, since page tokens may contain '/' and run past the file name limit.
+
+    Args:
+        key (tuple): The parts of the cache key, e.g. ('video', video_id).
+
+    Returns:
+        str: The path of the cache file.
+    """
+    return os.path.join(CACHE_DIR, hashlib.sha1('\0'.join(key).encode()).hexdigest() + '.json')
+
+
+def read_cache(*key):
+    """
+    Reads a cached API result.
+
+    Args:
+        *key (str): The parts of the cache key, e.g. ('video', video_id).
+
+    Returns:
+        The cached data, or None if it is missing, expired or unreadable.
+    """
+    path = cache_path(key)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with open(path, 'rb') as f:
+            return json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def write_cache(data, *key):
+    """
+    Caches an API result on disk.
+
+    Args:
+        data: The JSON-serializable data to cache.
+        *key (str): The parts of the cache key, e.g. ('video', video_id).
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_path(key), 'wb') as f:
+            f.write(json_dumps(data))
+    except OSError as e:
+        print(f"Error occurred while writing cache: {e}")
 
 
-def get_channel_id_by_username(username):
+async def get_channel_id_by_username(session, semaphore, username):
     """
     Fetches the channel ID for a given username (or channel handle).
-    
+
     Args:
+        session (aiohttp.ClientSession): The HTTP session to send requests with.
+        semaphore (asyncio.Semaphore): Limits the number of requests in flight.
         username (str): The YouTube channel handle.
 
     Returns:
         str or None: The channel ID if found, otherwise None.
     """
     try:
-        request = youtube.channels().list(
-            part='id',
-            forHandle=username
-        )
-        response = request.execute()
+        response = await fetch_api(session, semaphore, 'channels', {
+            'part': 'id',
+            'forHandle': username,
+            'fields': 'items/id'
+        })
 
         # Extract the channel ID
         items = response.get('items')
@@ -39,236 +249,613 @@ def get_channel_id_by_username(username):
         else:
             print(f"No channel found with title: {username}")
             return None
-    except Exception as e:
+    except API_ERRORS as e:
         print(f"Error occurred while fetching channel ID: {e}")
         return None
 
 
-def get_videos_by_channel_id(channel_id):
+async def get_videos_by_channel_id(session, semaphore, channel_id, on_videos, skip_video_ids=()):
     """
     Fetches details of videos from a channel given its channel ID.
 
+    The videos are listed from the channel's uploads playlist, which costs
+    1 quota unit per page (search.list costs 100) and is not capped at
+    ~500 results. The details of each page are fetched while the next page
+    is listed, and handed to on_videos as soon as they arrive, so they need
+    not be kept in memory.
+
     Args:
+        session (aiohttp.ClientSession): The HTTP session to send requests with.
+        semaphore (asyncio.Semaphore): Limits the number of requests in flight.
         channel_id (str): The YouTube channel ID.
+        on_videos (callable): Called with each list of VideoRow tuples containing video details.
+        skip_video_ids (set): IDs of videos whose details are not fetched, e.g. saved by an earlier run.
 
     Returns:
-        list: A list of dictionaries containing video details.
+        list: The IDs of all videos of the channel, including skipped ones.
     """
-    videos = []
-    next_page_token = None
-
-    # Fetch videos from the channel
-    while True:
-        try:
-            request = youtube.search().list(
-                part='snippet',
-                channelId=channel_id,
-                maxResults=50,
-                order='date',
-                type='video',
-                pageToken=next_page_token
-            )
-            response = request.execute()
-
-            # Collect video details
-            for item in response['items']:
-                video_id = item['id']['videoId']
-                
-                # Fetch more detailed video information
-                video_details = get_video_details(video_id)
-                if video_details:
-                    videos.append(video_details)
-
-            # Check if there's another page of results
-            next_page_token = response.get('nextPageToken')
-            if not next_page_token:
+    # Look up the playlist holding all uploads of the channel
+    try:
+        response = await fetch_api(session, semaphore, 'channels', {
+            'part': 'contentDetails',
+            'id': channel_id,
+            'fields': 'items/contentDetails/relatedPlaylists/uploads'
+        })
+    except API_ERRORS as e:
+        print(f"Error occurred while fetching uploads playlist: {e}")
+        return []
+
+    items = response.get('items')
+    if not items:
+        print(f"No channel found with ID: {channel_id}")
+        return []
+    uploads_playlist_id = items[0]['contentDetails']['relatedPlaylists']['uploads']
+
+    def fetch_page(page_token):
+        return asyncio.create_task(fetch_api(session, semaphore, 'playlistItems', {
+            'part': 'contentDetails',
+            'playlistId': uploads_playlist_id,
+            'maxResults': 50,
+            'pageToken': page_token,
+            'fields': 'items/contentDetails/videoId,nextPageToken'
+        }))
+
+    video_ids = []
+    seen = set()
+    details_tasks = []
+
+    # Fetch videos from the uploads playlist; the next page is requested
+    # while the current one is processed
+    next_page = fetch_page(None)
+    try:
+        while next_page is not None:
+            try:
+                response = await next_page
+            except API_ERRORS as e:
+                print(f"Error occurred while fetching videos: {e}")
                 break
-        except Exception as e:
-            print(f"Error occurred while fetching videos: {e}")
-            break
 
-    return videos
+            # Check if there's another page of results and start fetching it
+            next_page_token = response.get('nextPageToken')
+            next_page = fetch_page(next_page_token) if next_page_token else None
+
+            # Collect the video IDs of this page, skipping ones already seen
+            page_video_ids = []
+            for item in response.get('items', []):
+                video_id = item['contentDetails']['videoId']
+                if video_id not in seen:
+                    seen.add(video_id)
+                    video_ids.append(video_id)
+                    if video_id not in skip_video_ids:
+                        page_video_ids.append(video_id)
+
+            # Fetch detailed information for the page's videos in the background
+            if page_video_ids:
+                details_tasks.append(asyncio.create_task(
+                    get_videos_details(session, semaphore, page_video_ids, on_videos)
+                ))
+
+        await asyncio.gather(*details_tasks)
+    finally:
+        # Stop the requests still in flight if listing or fetching failed
+        for task in details_tasks:
+            task.cancel()
+        await asyncio.gather(*details_tasks, return_exceptions=True)
+
+    return video_ids
+
+
+async def get_videos_details(session, semaphore, video_ids, on_videos):
+    """
+    Fetches detailed information about several videos, 50 IDs per videos.list
+    call. The calls are sent concurrently. Videos found in the cache are not fetched.
 
+    Args:
+        session (aiohttp.ClientSession): The HTTP session to send requests with.
+        semaphore (asyncio.Semaphore): Limits the number of requests in flight.
+        video_ids (list): The YouTube video IDs.
+        on_videos (callable): Called with each list of VideoRow tuples containing video details.
+    """
+    cached_videos = []
+    missing_ids = []
+    for video_id in video_ids:
+        video = read_cache('video', video_id)
+        if video is None:
+            missing_ids.append(video_id)
+        else:
+            cached_videos.append(VideoRow(**video))
+    if cached_videos:
+        on_videos(cached_videos)
 
-def get_video_details(video_id):
+    async def fetch_chunk(chunk):
+        try:
+            response = await fetch_api(session, semaphore, 'videos', {
+                'part': 'snippet,contentDetails,statistics',
+                'id': ','.join(chunk),
+                'fields': VIDEO_RESPONSE_FIELDS
+            })
+        except API_ERRORS as e:
+            print(f"Error occurred while fetching video details: {e}")
+            return
+        videos = [parse_video_item(item) for item in response.get('items', [])]
+        for video in videos:
+            write_cache(video._asdict(), 'video', video.video_id)
+        on_videos(videos)
+
+    await asyncio.gather(*[
+        fetch_chunk(missing_ids[i:i + VIDEOS_PER_REQUEST])
+        for i in range(0, len(missing_ids), VIDEOS_PER_REQUEST)
+    ])
+
+
+async def get_video_details(session, semaphore, video_id):
     """
     Fetches detailed information about a specific video.
 
     Args:
+        session (aiohttp.ClientSession): The HTTP session to send requests with.
+        semaphore (asyncio.Semaphore): Limits the number of requests in flight.
         video_id (str): The YouTube video ID.
 
     Returns:
-        dict or None: A dictionary containing video details, or None if not found.
+        VideoRow or None: A tuple containing video details, or None if not found.
     """
-    try:
-        request = youtube.videos().list(
-            part='snippet, contentDetails, statistics',
-            id=video_id
-        )
-        response = request.execute()
-        if not response['items']:
-            return None
-
-        item = response['items'][0]
-        snippet = item['snippet']
-        content_details = item['contentDetails']
-        statistics = item['statistics']
-        thumbnails = snippet['thumbnails']
-
-        return {
-            'video_id': video_id,
-            'title': snippet['title'],
-            'description': snippet['description'],
-            'published_at': snippet['publishedAt'],
-            'duration': content_details['duration'],
-            'view_count': statistics.get('viewCount'),
-            'like_count': statistics.get('likeCount'),
-            'comment_count': statistics.get('commentCount'),
-            'default_thumbnail': thumbnails['default']['url'],
-            'medium_thumbnail': thumbnails['medium']['url'],
-            'high_thumbnail': thumbnails['high']['url']
-        }
-    except Exception as e:
-        print(f"Error occurred while fetching video details for {video_id}: {e}")
-        return None
+    videos = []
+    await get_videos_details(session, semaphore, [video_id], videos.extend)
+    return videos[0] if videos else None
 
 
-def save_videos_to_excel(videos, filename="youtube_videos.xlsx"):
+def parse_video_item(item):
     """
-    Saves the data from the videos list to an Excel file.
+    Builds the video details tuple from a videos.list response item.
 
     Args:
-        videos (list): A list of dictionaries containing video details.
-        filename (str): The name of the Excel file to save data to.
-    """
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Videos"
-
-    # Set headers for the first row
-    headers = [
-        "Video ID", "Title", "Description", "Published At", "Duration",
-        "View Count", "Like Count", "Comment Count", "Default Thumbnail",
-        "Medium Thumbnail", "High Thumbnail"
-    ]
-    ws.append(headers)
-
-    # Add video details to each row
-    for video in videos:
-        row_data = [
-            video["video_id"], video["title"], video["description"], video["published_at"],
-            video["duration"], video.get("view_count"), video.get("like_count"), video.get("comment_count"),
-            video["default_thumbnail"], video["medium_thumbnail"], video["high_thumbnail"]
-        ]
-        ws.append(row_data)
-
-    # Save the workbook
-    wb.save(filename)
-    print(f"Excel file saved successfully: {filename}")
-
+        item (dict): A single item of a videos.list response.
 
-def get_comments_by_video_id(video_id, max_comments=100):
+    Returns:
+        VideoRow: A tuple containing video details.
+    """
+    snippet = item['snippet']
+    # With a fields selector, statistics is omitted entirely when all selected counts are hidden
+    statistics = item.get('statistics', {})
+    default_thumbnail, medium_thumbnail, high_thumbnail = get_thumbnails(snippet['thumbnails'])
+
+    return VideoRow(
+        item['id'],
+        *get_snippet_fields(snippet),
+        item['contentDetails']['duration'],
+        statistics.get('viewCount'),
+        statistics.get('likeCount'),
+        statistics.get('commentCount'),
+        default_thumbnail['url'],
+        medium_thumbnail['url'],
+        high_thumbnail['url']
+    )
+
+
+async def get_comments_by_video_id(session, semaphore, video_id, max_comments=100, include_replies=False, budget=None):
     """
-    Fetches the latest comments (and their replies) for a video.
+    Fetches the latest comments (and optionally their replies) for a video.
 
     Args:
+        session (aiohttp.ClientSession): The HTTP session to send requests with.
+        semaphore (asyncio.Semaphore): Limits the number of requests in flight.
         video_id (str): The YouTube video ID.
         max_comments (int): The maximum number of comments to fetch.
+        include_replies (bool): Whether to fetch the replies of each comment as well.
+        budget (dict): The number of comments still unclaimed, as {'remaining': n}. Each
+            request reserves the comments it asks for, so calls sharing the budget only
+            request what no other call has claimed; defaults to max_comments.
 
     Returns:
         list: A list of dictionaries containing comment details.
     """
     comments = []
     next_page_token = None
-    comment_count = 0
-
-    # Fetch comments from the video
-    while comment_count < max_comments:
+    part = 'snippet,replies' if include_replies else 'snippet'
+    fields = COMMENT_RESPONSE_FIELDS_WITH_REPLIES if include_replies else COMMENT_RESPONSE_FIELDS
+    if budget is None:
+        budget = {'remaining': max_comments}
+
+    # Fetch comments from the video, never requesting a page once enough comments are claimed
+    while budget['remaining'] > 0:
+        # Reserve the comments to ask for, so concurrent videos only request what is still unclaimed
+        max_results = min(100, budget['remaining'])
+        budget['remaining'] -= max_results
         try:
-            request = youtube.commentThreads().list(
-                part='snippet',
-                videoId=video_id,
-                textFormat='plainText',
-                maxResults=100,
-                pageToken=next_page_token
-            )
-            response = request.execute()
-
-            # Process comments and replies
-            for item in response['items']:
-                comment = item['snippet']['topLevelComment']['snippet']
-                comment_id = item['id']
-                comments.append({
-                    'video_id': video_id,
-                    'comment_id': comment_id,
-                    'comment_text': comment['textDisplay'],
-                    'author_name': comment['authorDisplayName'],
-                    'published_at': comment['publishedAt'],
-                    'like_count': comment['likeCount'],
-                    'reply_to': None
+            cache_key = ('comments', video_id, part, str(max_results), next_page_token or 'first')
+            response = read_cache(*cache_key)
+            if response is None:
+                response = await fetch_api(session, semaphore, 'commentThreads', {
+                    'part': part,
+                    'videoId': video_id,
+                    'textFormat': 'plainText',
+                    'maxResults': max_results,
+                    'pageToken': next_page_token,
+                    'fields': fields
                 })
-
-                # Handle replies, if any
-                if 'replies' in item:
-                    for reply in item['replies']['comments']:
-                        reply_snippet = reply['snippet']
-                        comments.append({
-                            'video_id': video_id,
-                            'comment_id': reply['id'],
-                            'comment_text': reply_snippet['textDisplay'],
-                            'author_name': reply_snippet['authorDisplayName'],
-                            'published_at': reply_snippet['publishedAt'],
-                            'like_count': reply_snippet['likeCount'],
-                            'reply_to': comment_id
-                        })
-
-            comment_count += len(response['items'])
-            next_page_token = response.get('nextPageToken')
-            if not next_page_token:
-                break
-        except Exception as e:
-            print(f"Error occurred while fetching comments: {e}")
+                write_cache(response, *cache_key)
+        except API_ERRORS as e:
+            print(f"Error occurred while fetching comments for {video_id}: {e}")
+            break
+        finally:
+            # Give the reservation back; the comments actually kept are charged below
+            budget['remaining'] += max_results
+
+        # Process comments and replies
+        page_comments = []
+        for item in response.get('items', []):
+            comment = item['snippet']['topLevelComment']['snippet']
+            comment_id = item['id']
+            page_comments.append({
+                'video_id': video_id,
+                'comment_id': comment_id,
+                'comment_text': comment['textDisplay'],
+                'author_name': comment['authorDisplayName'],
+                'published_at': comment['publishedAt'],
+                'like_count': comment['likeCount'],
+                'reply_to': None
+            })
+
+            # Handle replies, if requested and any
+            if include_replies and 'replies' in item:
+                for reply in item['replies']['comments']:
+                    reply_snippet = reply['snippet']
+                    page_comments.append({
+                        'video_id': video_id,
+                        'comment_id': reply['id'],
+                        'comment_text': reply_snippet['textDisplay'],
+                        'author_name': reply_snippet['authorDisplayName'],
+                        'published_at': reply_snippet['publishedAt'],
+                        'like_count': reply_snippet['likeCount'],
+                        'reply_to': comment_id
+                    })
+
+        # Keep only as many comments as are still wanted
+        page_comments = page_comments[:budget['remaining']]
+        budget['remaining'] -= len(page_comments)
+        comments.extend(page_comments)
+
+        next_page_token = response.get('nextPageToken')
+        if not next_page_token:
             break
 
     return comments
 
 
-def export_comments_to_excel(comments, filename="youtube_comments.xlsx"):
+async def get_comments_by_videos(session, semaphore, video_ids, on_comments, max_comments=100, include_replies=False):
+    """
+    Fetches comments for several videos concurrently, at most
+    MAX_CONCURRENT_REQUESTS videos at a time, stopping once max_comments
+    comments have been collected in total. The comments of each video are
+    handed to on_comments as soon as they arrive.
+
+    Args:
+        session (aiohttp.ClientSession): The HTTP session to send requests with.
+        semaphore (asyncio.Semaphore): Limits the number of requests in flight.
+        video_ids (list): The YouTube video IDs.
+        on_comments (callable): Called with the list of comments of each video.
+        max_comments (int): The maximum number of comments to fetch.
+        include_replies (bool): Whether to fetch the replies of each comment as well.
+
+    Returns:
+        int: The number of comments fetched.
+    """
+    comment_count = 0
+    # Shared by all videos, so every video stops fetching once the total is reached
+    budget = {'remaining': max_comments}
+    pending_video_ids = iter(video_ids)
+
+    async def worker():
+        nonlocal comment_count
+        # Only take the next video while comments are still unclaimed; a worker
+        # whose request leaves some unused gets them back and carries on
+        while budget['remaining'] > 0:
+            video_id = next(pending_video_ids, None)
+            if video_id is None:
+                break
+            comments = await get_comments_by_video_id(
+                session, semaphore, video_id, max_comments, include_replies, budget
+            )
+            on_comments(comments)
+            comment_count += len(comments)
+
+    workers = [asyncio.create_task(worker()) for _ in range(MAX_CONCURRENT_REQUESTS)]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        # Stop the other workers if one of them failed
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    return comment_count
+
+
+def finish_output(temp_filename, filename, commit):
     """
-    Exports the comments data to an Excel file.
+    Moves a written output file into place, or discards it.
+
+    Args:
+        temp_filename (str): The file the rows were written to.
+        filename (str): The output file it replaces.
+        commit (bool): Whether to keep the rows; if False, filename is left unchanged.
+
+    Returns:
+        bool: Whether filename was replaced.
+    """
+    if commit:
+        os.replace(temp_filename, filename)
+        return True
+    if os.path.exists(temp_filename):
+        os.remove(temp_filename)
+    print(f"Fetching did not finish, {filename} left unchanged")
+    return False
+
+
+def comment_rows(comments):
+    """
+    Returns an iterator of one row tuple per comment, in the column order of COMMENT_HEADERS.
 
     Args:
         comments (list): A list of dictionaries containing comment details.
+    """
+    return map(get_comment_row, comments)
+
+
+class ExcelRowWriter:
+    """
+    Streams rows into a single-sheet Excel file.
+
+    Uses xlsxwriter in constant-memory mode when it is installed, otherwise a
+    write-only openpyxl workbook. Both write the rows to disk as they are added.
+
+    The rows go to filename + TEMP_SUFFIX, which replaces filename on close()
+    unless the run failed.
+
+    Args:
         filename (str): The name of the Excel file to save data to.
+        headers (list): The column headers.
+        fields (tuple): The dictionary keys of the columns (unused).
+        sheet_name (str): The name of the worksheet.
+    """
+
+    def __init__(self, filename, headers, fields, sheet_name):
+        self.filename = filename
+        self.temp_filename = filename + TEMP_SUFFIX
+        if xlsxwriter is not None:
+            # Keep text as plain strings, the same way openpyxl writes it
+            self.workbook = xlsxwriter.Workbook(self.temp_filename, {
+                'constant_memory': True,
+                'strings_to_formulas': False,
+                'strings_to_urls': False
+            })
+            self.worksheet = self.workbook.add_worksheet(sheet_name)
+            self.worksheet.write_row(0, 0, headers)
+            self.row_index = 1
+        else:
+            self.workbook = openpyxl.Workbook(write_only=True)
+            self.worksheet = self.workbook.create_sheet(sheet_name)
+            self.worksheet.append(headers)
+
+    @staticmethod
+    def read_rows(filename):
+        """
+        Reads back the rows of a file written earlier.
+
+        Args:
+            filename (str): The name of the Excel file.
+
+        Returns:
+            list: The rows below the header, one tuple per row.
+        """
+        wb = openpyxl.load_workbook(filename, read_only=True)
+        rows = list(wb.active.iter_rows(min_row=2, values_only=True))
+        wb.close()
+        return rows
+
+    def write_rows(self, rows):
+        """Writes the given rows, one tuple per row."""
+        if xlsxwriter is not None:
+            for row_data in rows:
+                self.worksheet.write_row(self.row_index, 0, row_data)
+                self.row_index += 1
+        else:
+            for row_data in rows:
+                self.worksheet.append(row_data)
+
+    def close(self, commit=True):
+        """Finishes the file; it replaces filename if commit is set, otherwise it is deleted."""
+        if xlsxwriter is not None:
+            self.workbook.close()
+        elif commit:
+            self.workbook.save(self.temp_filename)
+        if finish_output(self.temp_filename, self.filename, commit):
+            print(f"Excel file saved successfully: {self.filename}")
+
+
+class CsvRowWriter:
+    """
+    Streams rows into a CSV file.
+
+    The rows go to filename + TEMP_SUFFIX, which replaces filename on close()
+    unless the run failed.
+
+    Args:
+        filename (str): The name of the CSV file to save data to.
+        headers (list): The column headers.
+        fields (tuple): The dictionary keys of the columns (unused).
+        sheet_name (str): The name of the worksheet (unused).
+    """
+
+    def __init__(self, filename, headers, fields, sheet_name):
+        self.filename = filename
+        self.temp_filename = filename + TEMP_SUFFIX
+        self.file = open(self.temp_filename, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(headers)
+
+    @staticmethod
+    def read_rows(filename):
+        """
+        Reads back the rows of a file written earlier.
+
+        Args:
+            filename (str): The name of the CSV file.
+
+        Returns:
+            list: The rows below the header, one tuple per row.
+        """
+        with open(filename, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            return [tuple(row) for row in reader]
+
+    def write_rows(self, rows):
+        """Writes the given rows, one tuple per row."""
+        self.writer.writerows(rows)
+
+    def close(self, commit=True):
+        """Finishes the file; it replaces filename if commit is set, otherwise it is deleted."""
+        self.file.close()
+        if finish_output(self.temp_filename, self.filename, commit):
+            print(f"CSV file saved successfully: {self.filename}")
+
+
+class ParquetRowWriter:
+    """
+    Streams rows into a Parquet file, PARQUET_ROW_GROUP_SIZE rows at a time.
+
+    Columns are named after the dictionary keys. Their types are taken from
+    the first row group; columns that are empty there are stored as strings.
+
+    The rows go to filename + TEMP_SUFFIX, which replaces filename on close()
+    unless the run failed.
+
+    Args:
+        filename (str): The name of the Parquet file to save data to.
+        headers (list): The column headers (unused).
+        fields (tuple): The dictionary keys of the columns.
+        sheet_name (str): The name of the worksheet (unused).
     """
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Comments"
 
-    # Set headers for the first row
-    headers = [
-        "Video ID", "Comment ID", "Comment Text", "Author Name",
-        "Published At", "Like Count", "Reply To"
-    ]
-    ws.append(headers)
+    def __init__(self, filename, headers, fields, sheet_name):
+        self.filename = filename
+        self.temp_filename = filename + TEMP_SUFFIX
+        self.fields = fields
+        self.rows = []
+        self.writer = None
+
+    @staticmethod
+    def read_rows(filename):
+        """
+        Reads back the rows of a file written earlier.
+
+        Args:
+            filename (str): The name of the Parquet file.
+
+        Returns:
+            list: The rows, one tuple per row.
+        """
+        return list(zip(*pyarrow.parquet.read_table(filename).to_pydict().values()))
+
+    def write_rows(self, rows):
+        """Writes the given rows, one tuple per row."""
+        self.rows.extend(rows)
+        if len(self.rows) >= PARQUET_ROW_GROUP_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows as one row group."""
+        columns = list(zip(*self.rows)) or [()] * len(self.fields)
+        if self.writer is None:
+            schema = pyarrow.schema([
+                (field, pyarrow.string() if pyarrow.types.is_null(column_type) else column_type)
+                for field, column_type in zip(self.fields, (pyarrow.array(column).type for column in columns))
+            ])
+            self.writer = pyarrow.parquet.ParquetWriter(self.temp_filename, schema)
+        schema = self.writer.schema
+        arrays = [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)]
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+        self.rows = []
+
+    def close(self, commit=True):
+        """Finishes the file; it replaces filename if commit is set, otherwise it is deleted."""
+        if commit and (self.rows or self.writer is None):
+            self.flush()
+        if self.writer is not None:
+            self.writer.close()
+        if finish_output(self.temp_filename, self.filename, commit):
+            print(f"Parquet file saved successfully: {self.filename}")
+
+
+# Row writers for each supported output format
+WRITERS = {
+    'xlsx': ExcelRowWriter,
+    'csv': CsvRowWriter,
+    'parquet': ParquetRowWriter
+}
+
+
+def read_saved_rows(row_writer, filename):
+    """
+    Reads the rows of an output file saved by an earlier run, if there is one.
 
-    # Add comment details to each row
-    for comment in comments:
-        row_data = [
-            comment["video_id"], comment["comment_id"], comment["comment_text"], comment["author_name"],
-            comment["published_at"], comment["like_count"], comment["reply_to"]
-        ]
-        ws.append(row_data)
+    Args:
+        row_writer (type): The row writer class of the file's format.
+        filename (str): The name of the output file.
 
-    # Save the workbook
-    wb.save(filename)
-    print(f"Excel file saved successfully: {filename}")
+    Returns:
+        list: The saved rows, or an empty list if the file is missing or unreadable.
+    """
+    if not os.path.exists(filename):
+        return []
+    try:
+        rows = row_writer.read_rows(filename)
+    except Exception as e:
+        print(f"Error occurred while reading {filename}, starting over: {e}")
+        return []
+    print(f"Resuming from {len(rows)} rows saved in {filename}")
+    return rows
 
 
-def main():
+def parse_args():
+    """
+    Parses the command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Fetch videos and comments of a YouTube channel.")
+    parser.add_argument(
+        '--format', choices=WRITERS, default='xlsx',
+        help="Output file format (default: xlsx)"
+    )
+    parser.add_argument(
+        '--include-replies', action='store_true',
+        help="Also fetch the replies of each comment"
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="Keep the videos saved by an earlier, interrupted run instead of fetching their details again"
+    )
+    return parser.parse_args()
+
+
+async def main():
     """
     Main function to fetch videos and comments for a given YouTube channel.
     """
+    args = parse_args()
+    if not API_KEY:
+        print("API_KEY is not set. Add it to a .env file or the environment.")
+        return
+    output_format = args.format
+    if output_format == 'parquet' and pyarrow is None:
+        print("Parquet output requires pyarrow. Install it with: pip install pyarrow")
+        return
+    row_writer = WRITERS[output_format]
+
     username = input("Enter YouTube channel username: ")
     try:
         max_comments = int(input("Enter the number of comments you want to fetch: "))
@@ -279,27 +866,65 @@ def main():
         username = username.split('/')[-1]
     except IndexError:
         print("Invalid URL. Please check & try again!")
-        return 
-
-    channel_id = get_channel_id_by_username(username)
-    if not channel_id:
         return
 
-    print(f"Fetching videos for channel ID: {channel_id}")
-    videos = get_videos_by_channel_id(channel_id)
-    save_videos_to_excel(videos, f'videos_data_{username}.xlsx')
-
-    all_comments = []
-    for video in videos:
-        if len(all_comments) >= max_comments:
-            break
-        video_id = video['video_id']
-        # print(f"Fetching comments for video ID: {video_id}")
-        comments = get_comments_by_video_id(video_id, max_comments=max_comments - len(all_comments))
-        all_comments.extend(comments)
-
-    export_comments_to_excel(all_comments, filename=f'comments_data_of_{username}.xlsx')
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # Size the connection pool to the concurrency limit so connections are reused
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        try:
+            channel_id = await get_channel_id_by_username(session, semaphore, username)
+            if not channel_id:
+                return
+
+            # When resuming, videos saved by an earlier run are kept and their details not fetched again
+            videos_filename = f'videos_data_{username}.{output_format}'
+            saved_video_rows = read_saved_rows(row_writer, videos_filename) if args.resume else []
+            saved_video_ids = [row[0] for row in saved_video_rows]
+
+            # Write the videos to disk as soon as their details arrive
+            print(f"Fetching videos for channel ID: {channel_id}")
+            video_writer = row_writer(videos_filename, VIDEO_HEADERS, VIDEO_FIELDS, "Videos")
+            finished = False
+            try:
+                video_ids = await get_videos_by_channel_id(
+                    session, semaphore, channel_id,
+                    video_writer.write_rows,
+                    set(saved_video_ids)
+                )
+                finished = True
+            finally:
+                # A resumed file keeps every saved row, so it is saved even if listing failed part-way
+                video_writer.write_rows(saved_video_rows)
+                video_writer.close(commit=finished or args.resume)
+            del saved_video_rows
+
+            # Saved videos missing from the listing (e.g. it failed part-way) still get their comments
+            listed_video_ids = set(video_ids)
+            video_ids.extend(video_id for video_id in saved_video_ids if video_id not in listed_video_ids)
+
+            # Write the comments of each video to disk as soon as they arrive
+            comment_writer = row_writer(
+                f'comments_data_of_{username}.{output_format}', COMMENT_HEADERS, COMMENT_FIELDS, "Comments"
+            )
+            finished = False
+            try:
+                await get_comments_by_videos(
+                    session, semaphore, video_ids,
+                    lambda comments: comment_writer.write_rows(comment_rows(comments)),
+                    max_comments, args.include_replies
+                )
+                finished = True
+            finally:
+                # Keep the earlier comments file unless all comments were fetched
+                comment_writer.close(commit=finished)
+        except QuotaExceededError as e:
+            # Everything fetched so far is in the cache, so a later run resumes from there
+            print(f"{e}. Progress has been cached; run the script again once the quota resets.")
 
 
 if __name__ == '__main__':
-    main()
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())